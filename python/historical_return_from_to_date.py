@@ -62,7 +62,7 @@ def historical_return_from_to_date(instrument, buy_date, sell_date):
     gain_ratios = []
 
     # use the close price if it exists
-    if 'close' in instrument.data.dtype.names:
+    if 'close' in instrument.cols:
         value_key = 'close'
     else:
         value_key = 'value'
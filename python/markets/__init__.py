@@ -189,5 +189,4 @@ def trading_days_ago(date, days, ticker='OBX.OSE'):
     """
     instrument = get_instrument(ticker)
     start_index = instrument.get_day_index_or_last_before(date)
-    row = instrument.data[start_index - days]
-    return datetime.date.fromtimestamp(row['date'])
\ No newline at end of file
+    return instrument._get_row(start_index - days)['date']
\ No newline at end of file
@@ -1,4 +1,5 @@
 import datetime
+from functools import lru_cache
 import numpy as np
 
 """
@@ -6,6 +7,41 @@ File containing classes for markets and instruments
 """
 
 
+# proleptic Gregorian ordinal of the epoch, 1970-01-01
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def _date_to_ts(year, month, day):
+    """
+    Convert a year/month/day triple to an epoch timestamp.
+
+    Plain calendar arithmetic is used instead of datetime.timestamp()
+    so that the result doesn't depend on the local timezone.
+
+    The same few dates repeat a lot in lookup loops, so the results
+    are cached. Keying on plain ints keeps the cache hash cheap.
+
+    Return(int):
+       Epoch timestamp at midnight UTC
+    """
+    return (datetime.date(year, month, day).toordinal()
+            - _EPOCH_ORDINAL) * 86400
+
+
+def _ts_to_date(timestamp):
+    """
+    Convert an epoch timestamp to a datetime.date.
+
+    The inverse of _date_to_ts(), also independent of the local
+    timezone.
+
+    Return:
+       datetime.date
+    """
+    return datetime.date.fromordinal(int(timestamp) // 86400 + _EPOCH_ORDINAL)
+
+
 class Instrument(object):
     def __init__(self, ticker, long_name, paper_type, exchange, data):
         """
@@ -20,6 +56,8 @@ class Instrument(object):
         self.long_name = long_name
         self.paper_type = paper_type
         self.exchange = exchange
+
+        # decomposed into self.cols by the data property setter
         self.data = data
 
     def __str__(self):
@@ -28,6 +66,88 @@ class Instrument(object):
     def __repr__(self):
         return self.ticker
 
+    @property
+    def data(self):
+        """
+        The instrument data as a structured numpy array.
+
+        The columns are stored internally as the dict self.cols of
+        contiguous 1-d arrays, since the column oriented layout is
+        what the lookup functions want: a structured array field is a
+        strided view, which knocks np.searchsorted and comparisons off
+        their fast paths.
+
+        Reading this property rebuilds the structured array, which
+        costs a full copy. Use self.cols directly when only some
+        columns are needed.
+        """
+        dtype = [(name, arr.dtype) for name, arr in self.cols.items()]
+        data = np.empty(len(self.cols['date']), dtype=dtype)
+        for name, arr in self.cols.items():
+            data[name] = arr
+        return data
+
+    @data.setter
+    def data(self, data):
+        self.cols = {}
+        for name in data.dtype.names:
+            col = np.ascontiguousarray(data[name])
+
+            # The date column is stored as int64 timestamps. The
+            # timestamps are whole seconds, and integer compares both
+            # avoid exact float equality checks and hit the fastest
+            # searchsorted path.
+            #
+            # Float data comes from pickles scraped before the switch
+            # to timezone independent timestamps, which hold local
+            # midnight rather than UTC midnight. Snap the timestamps
+            # to the nearest day boundary, which is exact for any
+            # timezone offset within +/- 12 hours and a no-op for
+            # data that already is at UTC midnight.
+            if name == 'date' and col.dtype != np.dtype('i8'):
+                col = (col.astype('i8') + 43200) // 86400 * 86400
+
+            self.cols[name] = col
+
+    def __setstate__(self, state):
+        # instruments pickled before the column oriented storage kept
+        # the structured array in a plain 'data' attribute
+        data = state.pop('data', None)
+        self.__dict__.update(state)
+        if data is not None and 'cols' not in state:
+            self.data = data
+
+    def _get_dates(self):
+        """
+        Get the date column.
+
+        The rows are sorted on the date column, so lookups can use
+        np.searchsorted on this array instead of scanning all rows.
+
+        Return:
+           Contiguous numpy array with the date timestamps
+        """
+        return self.cols['date']
+
+    def _get_date_index(self):
+        """
+        Get a cached dict mapping date timestamps to row indexes.
+
+        Queries for many single dates on the same instrument then
+        cost one hash probe each instead of a search per call.
+
+        The date column may be replaced wholesale (see
+        Strategy.get_instrument), in which case the dict is rebuilt.
+
+        Return:
+           Dict mapping timestamp to row index
+        """
+        dates = self.cols['date']
+        if getattr(self, '_date_index_source', None) is not dates:
+            self._date_index = dict(zip(dates.tolist(), range(len(dates))))
+            self._date_index_source = dates
+        return self._date_index
+
     def get_first_date(self):
         """
         Get the first data item for this instrument
@@ -35,7 +155,7 @@ class Instrument(object):
         Return:
            datetime.date
         """
-        return datetime.date.fromtimestamp(self.data[0]['date'])
+        return _ts_to_date(self.cols['date'][0])
 
     def get_last_date(self):
         """
@@ -44,7 +164,7 @@ class Instrument(object):
         Return:
            datetime.date
         """
-        return datetime.date.fromtimestamp(self.data[-1]['date'])
+        return _ts_to_date(self.cols['date'][-1])
 
     def _get_row(self, index):
         """
@@ -56,15 +176,11 @@ class Instrument(object):
         Raises:
            IndexError if the row index doesn't exist
         """
-        # get the row values
-        row_values = self.data[index]
-
-        # create the return dict
-        column_names = self.data.dtype.names
-        d = dict(zip(column_names, row_values))
+        # create the return dict from the column arrays
+        d = {name: arr[index] for name, arr in self.cols.items()}
 
         # translate timestamp date to datetime.date
-        d['date'] = datetime.date.fromtimestamp(d['date'])
+        d['date'] = _ts_to_date(d['date'])
 
         return d
 
@@ -82,28 +198,16 @@ class Instrument(object):
            KeyError if there is no data for this date
         """
         # convert to timestamp
-        timestamp = datetime.datetime(
-            date.year, date.month, date.day).timestamp()
+        timestamp = _date_to_ts(date.year, date.month, date.day)
 
-        # get matching rows
-        matches = np.where(self.data['date'] == timestamp)[0]
-        match_count = len(matches)
+        # look up the timestamp in the cached date index
+        row_index = self._get_date_index().get(timestamp)
 
-        # no matching rows
-        if match_count == 0:
+        # no matching row
+        if row_index is None:
             raise KeyError(str(self) + ": date not found: " + str(date))
 
-        # if there was exactly one matching row
-        elif match_count == 1:
-            # get the index of the matching row
-            row_index = matches[0]
-
-            return row_index
-
-        # if there were more than one matching row
-        else:
-            # There must be something wrong in the database, which one should we return?
-            raise Exception("There was more than one matching row")
+        return row_index
 
     def get_day_index_or_last_before(self, date):
         """
@@ -120,21 +224,18 @@ class Instrument(object):
            KeyError if there is no data for this date or earlier dates
         """
         # convert to timestamp
-        timestamp = datetime.datetime(
-            date.year, date.month, date.day).timestamp()
+        timestamp = _date_to_ts(date.year, date.month, date.day)
 
-        matches = np.where(self.data['date'] <= timestamp)[0]
-        match_count = len(matches)
+        # find the index of the last row with date <= timestamp
+        dates = self._get_dates()
+        row_index = np.searchsorted(dates, timestamp, side='right') - 1
 
         # no matching rows
-        if match_count == 0:
+        if row_index < 0:
             raise KeyError(str(self) + ": Date not found: " + str(date) +
                            ", first date is " + str(self.get_first_date()))
 
-        else:
-            # get the index of the last matching row
-            row_index = matches[-1]
-            return row_index
+        return row_index
 
     def get_day(self, date):
         """
@@ -152,6 +253,48 @@ class Instrument(object):
         row_index = self.get_day_index(date)
         return self._get_row(row_index)
 
+    def get_days(self, dates):
+        """
+        Get the data for several dates with a single lookup.
+
+        All dates are converted to timestamps up front and resolved
+        with one vectorized searchsorted against the date column, so
+        the cost is a few numpy calls instead of one full lookup per
+        date.
+
+        Args:
+           dates: Sequence of datetime.date
+
+        Return:
+           Structured numpy array with the rows for the dates,
+           in the same order as the dates argument
+
+        Raises:
+           KeyError if any of the dates has no data
+        """
+        timestamps = np.fromiter(
+            (_date_to_ts(d.year, d.month, d.day) for d in dates),
+            dtype='i8', count=len(dates))
+
+        all_dates = self._get_dates()
+        indexes = np.searchsorted(all_dates, timestamps, side='left')
+
+        # clip so that the validation below can index safely
+        indexes = np.clip(indexes, 0, len(all_dates) - 1)
+
+        # check that every timestamp was actually found
+        found = all_dates[indexes] == timestamps
+        if not found.all():
+            missing = [d for d, ok in zip(dates, found) if not ok]
+            raise KeyError(str(self) + ": dates not found: " + str(missing))
+
+        # gather the rows column by column
+        dtype = [(name, arr.dtype) for name, arr in self.cols.items()]
+        rows = np.empty(len(indexes), dtype=dtype)
+        for name, arr in self.cols.items():
+            rows[name] = arr[indexes]
+        return rows
+
     def get_day_or_first_after(self, date):
         """
         Get the data for the first date after
@@ -166,21 +309,17 @@ class Instrument(object):
            KeyError if there is no data for this or later dates
         """
         # convert to timestamp
-        timestamp = datetime.datetime(
-            date.year, date.month, date.day).timestamp()
+        timestamp = _date_to_ts(date.year, date.month, date.day)
 
-        # get matching rows
-        matches = np.where(self.data['date'] >= timestamp)[0]
-        match_count = len(matches)
+        # find the index of the first row with date >= timestamp
+        dates = self._get_dates()
+        row_index = np.searchsorted(dates, timestamp, side='left')
 
         # no matching rows
-        if match_count == 0:
+        if row_index == len(dates):
             raise KeyError("Date not found :" + str(date))
-        else:
-            # get the index of the first matching row
-            row_index = matches[0]
 
-            return self._get_row(row_index)
+        return self._get_row(row_index)
 
     def get_day_or_last_before(self, date):
         """
@@ -196,21 +335,17 @@ class Instrument(object):
            KeyError if there is no data for this or previous dates
         """
         # convert to timestamp
-        timestamp = datetime.datetime(
-            date.year, date.month, date.day).timestamp()
+        timestamp = _date_to_ts(date.year, date.month, date.day)
 
-        # get matching rows
-        matches = np.where(self.data['date'] <= timestamp)[0]
-        match_count = len(matches)
+        # find the index of the last row with date <= timestamp
+        dates = self._get_dates()
+        row_index = np.searchsorted(dates, timestamp, side='right') - 1
 
         # no matching rows
-        if match_count == 0:
+        if row_index < 0:
             raise KeyError("Date not found :" + str(date))
-        else:
-            # get the index of the last matching row
-            row_index = matches[-1]
 
-            return self._get_row(row_index)
+        return self._get_row(row_index)
 
     def get_price(self, date):
         """
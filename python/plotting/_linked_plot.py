@@ -5,6 +5,66 @@ from setproctitle import setproctitle
 import datetime
 import numpy as np
 import signal
+from functools import lru_cache
+
+
+# proleptic Gregorian ordinal of the epoch, 1970-01-01
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# Y anchor points for marker text boxes, indexed by the number of
+# lines in the box. I don't know how to derive these properly.
+_ANCHOR_Y = (None, 1.8, 1.45, 1.32, 1.25, 1.2, 1.15)
+
+# background rgba colors for the marker arrows and text boxes
+_BRUSHES = {'blue': (0, 0, 255, 110),
+            'green': (0, 255, 0, 110),
+            'red': (255, 0, 0, 150)}
+
+
+@lru_cache(maxsize=4096)
+def _date_to_ts(year, month, day):
+    """
+    Convert a year/month/day triple to an epoch timestamp.
+
+    Plain calendar arithmetic is used instead of datetime.timestamp()
+    so that the result doesn't depend on the local timezone and
+    matches the timestamps produced by the datetime64 conversion in
+    add_subplot().
+
+    Marker placement tends to hit the same few dates repeatedly, so
+    the results are cached. Keying on plain ints keeps the cache hash
+    cheap.
+
+    Return(float):
+        Epoch timestamp at midnight UTC
+    """
+    return (datetime.date(year, month, day).toordinal()
+            - _EPOCH_ORDINAL) * 86400.0
+
+
+def _nearest_index(x_data, x):
+    """
+    Get the index of the value in the sorted array x_data closest to x
+
+    Args:
+        x_data: Monotonically increasing numpy array
+        x(float): The value to search for
+
+    Return(int):
+        Index of the nearest value
+    """
+    i = np.searchsorted(x_data, x)
+    if i == 0:
+        return 0
+    if i == len(x_data):
+        return len(x_data) - 1
+
+    # pick the closer of the two neighboring values
+    if (x_data[i] - x) < (x - x_data[i - 1]):
+        return i
+    else:
+        return i - 1
+
 
 class LinkedPlotWidget(pg.GraphicsLayoutWidget):
     """
@@ -31,14 +91,27 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
         self.cursor_x_label = ''
         self.cursor_y_label = ''
 
+        # the last day number and formatted date shown in the label
+        self.label_day = None
+        self.label_day_str = ''
+
         # install an event filter to detect that the mouse leaves the widget
         self.installEventFilter(self)
+
+        # Timer for coalescing bursts of mouse move events.
+        # The scene can emit several hundred events per second on a
+        # fast mouse, so the heavy crosshair work is deferred and run
+        # at ~30 Hz with the latest known position.
+        self.move_timer = QtCore.QTimer(self)
+        self.move_timer.setSingleShot(True)
+        self.move_timer.setInterval(33)
+        self.move_timer.timeout.connect(self.handle_mouse_moved)
+        self.pending_mouse_pos = None
         
         self.plot_row_counter = 1
         self.first_plot = None
         self.plots = {}
         self.latest_plot = None
-        self.first_plot = None
 
     def add_plot(self, plot_title, title_above, title_in_legend):
 
@@ -57,6 +130,14 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
         plot.title_in_legend = title_in_legend
         self.plot_row_counter += 1
 
+        # flat list of (x_data, y_data, html_prefix) tuples,
+        # one per subplot, iterated by the mouse moved handler instead
+        # of walking the pyqtgraph data item lists
+        plot.subplot_meta = []
+
+        # unique ids of the subplots in this plot
+        plot.subplot_ids = set()
+
         # some predefined colors that aren't too ugly
         plot.nice_colors = [(255, 255, 255),
                             (162, 195, 249),
@@ -125,23 +206,21 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
             display_name = self.latest_plot.display_name + "_" + display_name
 
         # check that there doesn't exist a subplot with this name
-        for subplot in self.latest_plot.dataItems:
-            if subplot.unique_id == unique_id:
-                raise ValueError("subplot " + str(unique_id) + " already exists")
-        
+        if unique_id in self.latest_plot.subplot_ids:
+            raise ValueError("subplot " + str(unique_id) + " already exists")
+
+
         # if the numpy 'data' column is a Python object, assume it's datatime.date
         if numpy_array['date'].dtype == np.dtype('O'):
 
+            # convert the dates to timestamps in a single vectorized
+            # pass instead of constructing a datetime object per row
+            dt64 = np.array(numpy_array['date'].tolist(), dtype='datetime64[s]')
+
             # construct a new array for the date column converted to timestamp
             date_array = np.empty(shape=(len(numpy_array['date'])),
                                   dtype=[('date', 'f8')])
-
-            # fill the new array
-            for i, d in enumerate(numpy_array['date']):
-
-                # convert the datetime.date to a timestamp
-                dt = datetime.datetime(d.year, d.month, d.day)
-                date_array[i] = dt.timestamp(),
+            date_array['date'] = dt64.astype('int64').astype('f8')
 
         # assume that numpy_array['date'] is an epoch timestamp
         else:
@@ -163,6 +242,20 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
         subplot.parent_plot = self.latest_plot
         subplot.unique_id = unique_id
         subplot.display_name = display_name
+        self.latest_plot.subplot_ids.add(unique_id)
+
+        # Keep direct references to the x and y numpy arrays.
+        # getData() does non-trivial work in pyqtgraph, and the hot
+        # paths only need the raw arrays that were passed in.
+        subplot.x_cached = date_array['date']
+        subplot.y_cached = numpy_array[y_axis_name]
+
+        # Register this subplot with the parent plot's metadata list.
+        # The static part of the value box html is formatted here once
+        # instead of on every mouse move event.
+        html_prefix = "<span style='color: rgb%s'>%s=" % (color, display_name)
+        self.latest_plot.subplot_meta.append(
+            (subplot.x_cached, subplot.y_cached, html_prefix))
 
         # connect the mouse moved listener
         subplot.scene().sigMouseMoved.connect(self.mouse_moved)
@@ -194,43 +287,93 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
 
         # try to convert date/datetime to timestamp
         try:
-            timestamp = datetime.datetime(
-                date.year, date.month, date.day).timestamp()
+            timestamp = _date_to_ts(date.year, date.month, date.day)
         except:
             # try to use the the value as is
             timestamp = date
 
         ld = self.get_subplot(plot_title, y_axis_name, display_name)
 
-        # get the index containing the nearest timestamp value for this x position
-        x_data = ld.getData()[0]
-        matches = np.where(x_data == timestamp)[0]
-
-        # if this happens, there is something wrong with the data
-        if len(matches) > 1:
-            raise Exception(
-                "There are more than one x index containing this timestamp")
-
-        elif len(matches) < 1:
+        # binary search for the timestamp in the sorted x axis data
+        x_data = ld.x_cached
+        x_index = np.searchsorted(x_data, timestamp)
+        if x_index == len(x_data) or x_data[x_index] != timestamp:
             raise IndexError("The timestamp " + str(date) +
                              " wasn't found in the data set")
 
+        # background color
+        try:
+            brush = _BRUSHES[color]
+        except KeyError:
+            raise Exception("Color '%s' isn't implemented" % color)
+
+        self._place_marker(pl, ld, x_index, angle, text, brush)
+
+    def add_markers(self, plot_title, y_axis_name, dates, display_name=None,
+                    angles=None, texts=None, colors=None):
+        """
+        Add markers to several dates on a subplot curve in one call.
+
+        All dates are converted to timestamps up front and located
+        with a single vectorized binary search, so only the per-marker
+        Qt item construction remains in the loop.
+
+        args:
+            plot_title: Title of the plot containing the subplot
+            y_axis_name: Y-axis column name as given in add_subplot()
+            dates: Sequence of datetime.date to attach markers to
+            display_name: Display name of the subplot to get
+            angles: Sequence of arrow angles, or None for all -90
+            texts: Sequence of text box texts, or None for no texts
+            colors: Sequence of color names, or None for all 'blue'
+        """
+        # get the plot and the subplot
+        pl = self.get_plot(plot_title)
+        ld = self.get_subplot(plot_title, y_axis_name, display_name)
+
+        # convert all dates to timestamps
+        timestamps = np.fromiter(
+            (_date_to_ts(d.year, d.month, d.day) for d in dates),
+            dtype='f8', count=len(dates))
+
+        # find all indexes with one binary search over the x axis data
+        x_data = ld.x_cached
+        indexes = np.searchsorted(x_data, timestamps)
+
+        # clip so that the validation below can index safely
+        indexes = np.clip(indexes, 0, len(x_data) - 1)
+
+        # check that every timestamp was actually found
+        found = x_data[indexes] == timestamps
+        if not found.all():
+            missing = [d for d, ok in zip(dates, found) if not ok]
+            raise IndexError("The timestamps " + str(missing) +
+                             " weren't found in the data set")
+
+        if angles is None:
+            angles = [-90] * len(dates)
+        if texts is None:
+            texts = [""] * len(dates)
+
+        # Resolve all background colors before placing anything, so
+        # that an unknown color name doesn't leave the plot with only
+        # part of the batch added.
+        if colors is None:
+            brushes = [_BRUSHES['blue']] * len(dates)
         else:
-            x_index = matches[0]
+            try:
+                brushes = [_BRUSHES[color] for color in colors]
+            except KeyError as e:
+                raise Exception("Color %s isn't implemented" % e)
+
+        for x_index, angle, text, brush in zip(indexes, angles, texts, brushes):
+            self._place_marker(pl, ld, x_index, angle, text, brush)
+
+    def _place_marker(self, pl, ld, x_index, angle, text, brush):
 
         # a curvepoint refers to an xy point on the plot line
         curvePoint = pg.CurvePoint(ld, index=x_index)
 
-        # background color
-        if color == 'blue':
-            brush = (0, 0, 255, 110)  # blue
-        elif color == 'green':
-            brush = (0, 255, 0, 110)  # green
-        elif color == 'red':
-            brush = (255, 0, 0, 150)  # red
-        else:
-            raise Exception("Color '%s' isn't implemented" % color)
-
         # create an arrow
         arrow = pg.ArrowItem(angle=angle, brush=brush)
         arrow.setParentItem(curvePoint)
@@ -246,23 +389,14 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
             # create html text box
             html = '<div style="text-align: center">%s</div>' % "<br>".join(spans)
 
-            # Adjust the y anchor point to the number of lines in the text box.
-            # I don't know how to so this properly.
-            if len(spans) == 1:
-                anchor_y = 1.8
-            elif len(spans) == 2:
-                anchor_y = 1.45
-            elif len(spans) == 3:
-                anchor_y = 1.32
-            elif len(spans) == 4:
-                anchor_y = 1.25
-            elif len(spans) == 5:
-                anchor_y = 1.2
-            elif len(spans) == 6:   
-                anchor_y = 1.15
-            else:
+            # adjust the y anchor point to the number of lines in the text box
+            try:
+                anchor_y = _ANCHOR_Y[len(spans)]
+            except IndexError:
+                anchor_y = None
+            if anchor_y is None:
                 raise Exception(
-                    "%d line count text box isn't implemented" % anchor_y)
+                    "%d line count text box isn't implemented" % len(spans))
 
             # create the text box and attach it to the curve point
             text = pg.TextItem(html=html, anchor=(
@@ -273,6 +407,13 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
 
     def leaveEvent(self, event):
         """Called when the mouse leaves this widget"""
+
+        # cancel any pending mouse move update, so that it doesn't
+        # fire after this and redraw the crosshair from the last
+        # in-bounds position
+        self.move_timer.stop()
+        self.pending_mouse_pos = None
+
         self.crosshair_visible(False)
         self.hide_label()
 
@@ -281,7 +422,7 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
 
         for plot in self.plots.values():
             # get a reference to the x-axis numpy data (time column)
-            time_col = plot.dataItems[0].xData
+            time_col = plot.subplot_meta[0][0]
 
             plot.event_line.setPos(timestamp)
             plot.event_line.setVisible(True)
@@ -294,12 +435,20 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
 
     def update_label(self, cursor_x, cursor_y):
         """Change the labels. Arguments are floats"""
-        timestamp = datetime.date.fromtimestamp(cursor_x)
-        timestamp_str = timestamp.strftime("%Y-%m-%d")
+
+        # The formatted date only changes when the cursor crosses into
+        # another day, so reuse the last string until it does instead
+        # of building and formatting a date object per event.
+        day = int(cursor_x) // 86400
+        if day != self.label_day:
+            self.label_day_str = datetime.date.fromordinal(
+                day + _EPOCH_ORDINAL).strftime("%Y-%m-%d")
+            self.label_day = day
+
         text = "<span>crosshair</span>: " \
                "<span style='color: Aqua'>x=%s</span>, " \
-               "<span style='color: GreenYellow'>y=%s</span>" % (
-                   timestamp_str, str(round(cursor_y, 4)))
+               "<span style='color: GreenYellow'>y=%.4f</span>" % (
+                   self.label_day_str, cursor_y)
         self.label.setText(text)
 
     def hide_label(self):
@@ -307,7 +456,27 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
         self.label.setText('')
 
     def mouse_moved(self, pos):
-        """Callback when mouse is moved"""
+        """Callback when mouse is moved.
+
+        Only records the position and arms the coalescing timer,
+        the actual work happens in handle_mouse_moved().
+        """
+        # nothing to update when there are no plots or we're not shown
+        if not self.plots or not self.isVisible():
+            return
+
+        self.pending_mouse_pos = pos
+        if not self.move_timer.isActive():
+            self.move_timer.start()
+
+    def handle_mouse_moved(self):
+        """Update the crosshair and value texts for the latest mouse position"""
+
+        # the plots may have been removed since the timer was armed
+        if not self.plots:
+            return
+
+        pos = self.pending_mouse_pos
         mouse_is_over_a_plot = False
 
         for pl in self.plots.values():
@@ -337,22 +506,22 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
         # if the mouse pointer is over any of the plots
         if mouse_is_over_a_plot:
 
+            # The x position of the vertical crosshair line.
+            # The x-axes are linked, so the view x coordinate from the
+            # last plot iterated above is valid for all of them.
+            x_mouse = mousePoint.x()
+
             for pl in self.plots.values():
                 pl.v_line.setVisible(True)
 
-                # get the x position of the vertical crosshair line
-                x_mouse = mousePoint.x()
-
-                text = ""
+                # html fragments to join into the value box text
+                parts = []
 
                 # get the numpy arrays containing the x and y data for all subplots
-                for subplot in pl.listDataItems():
-                    data = subplot.getData()
-                    x_data = data[0]
-                    y_data = data[1]
+                for x_data, y_data, html_prefix in pl.subplot_meta:
 
                     # get the index containing the nearest timestamp value for this x position
-                    x_index = (np.abs(x_data - x_mouse)).argmin()
+                    x_index = _nearest_index(x_data, x_mouse)
 
                     # if the x index is at the min position
                     if x_index == 0:
@@ -373,13 +542,12 @@ class LinkedPlotWidget(pg.GraphicsLayoutWidget):
                         # get the y value
                         y = y_data[x_index]
 
-                        color = subplot.opts['pen']
-
                         # set the y value at the vertical line on this plot at the x position
-                        text += "<span style='color: rgb%s'>%s=%s</span><br>" % (
-                            color, subplot.display_name, str(round(y, 4)))
+                        parts.append(html_prefix)
+                        parts.append(format(y, '.4f'))
+                        parts.append("</span><br>")
 
-                pl.value_text.setHtml(text)
+                pl.value_text.setHtml("".join(parts))
 
         else:
             # hide the crosshair text
@@ -532,3 +700,27 @@ class LinkedPlot():
         """
         self.linked_plot_widget.add_marker(
             date, plot_title, y_axis_name, display_name, angle, text, color)
+
+    def add_markers(self, plot_title, y_axis_name, dates, display_name=None,
+                    angles=None, texts=None, colors=None):
+        """
+        Add markers to several dates on a subplot curve in one call.
+        This is much faster than calling add_marker() in a loop
+        because the date lookups are batched.
+
+        args:
+            plot_title: Title of the plot containing the subplot
+            y_axis_name: Y-axis column name as given in add_subplot() call
+            dates: Sequence of datetime.date to attach markers to
+            display_name: Display name of the subplot to get
+            angles: Sequence of arrow angles, or None for all -90
+            texts: Sequence of text box texts, or None for no texts
+            colors: Sequence of color names, or None for all 'blue'
+
+        Raises:
+           IndexError: If any of the dates isn't present in the data set
+           KeyError: If the plot or subplot isn't found
+        """
+        self.linked_plot_widget.add_markers(
+            plot_title, y_axis_name, dates, display_name,
+            angles, texts, colors)
@@ -159,12 +159,13 @@ def simulate(strategy, money, from_date, to_date, reference):
     plot.add_subplot(matrix, "account_value", "Account value")
     plot.add_subplot(matrix, "reference_value", str(reference))
 
-    for date, text in action_markers:
-        plot.add_marker(date,
-                        "Account value",
-                        "account_value",
-                        "Account value",
-                        text=text)
+    if action_markers:
+        marker_dates, marker_texts = zip(*action_markers)
+        plot.add_markers("Account value",
+                         "account_value",
+                         marker_dates,
+                         display_name="Account value",
+                         texts=marker_texts)
 
     plot.show()
 
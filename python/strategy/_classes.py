@@ -1,6 +1,5 @@
 from abc import ABCMeta, abstractmethod
 from copy import deepcopy
-import numpy as np
 import datetime
 
 import markets
@@ -178,7 +177,8 @@ class Strategy(object, metaclass=ABCMeta):
         row_index = instrument.get_day_index_or_last_before(self.today)
 
         # delete data which is into the future and the strategy now nothing of
-        instrument.data = np.delete(instrument.data, np.s_[row_index + 1:])
+        instrument.cols = {name: arr[:row_index + 1]
+                           for name, arr in instrument.cols.items()}
 
         return instrument
 
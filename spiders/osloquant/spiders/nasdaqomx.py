@@ -6,6 +6,9 @@ import re
 import datetime
 import numpy as np
 
+# proleptic Gregorian ordinal of the epoch, 1970-01-01
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
 class NasdaqOmxSpider(scrapy.Spider):
     name = 'nasdaqomx'
     allowed_domains = ['nasdaqomx.com']
@@ -118,7 +121,7 @@ class NasdaqOmxSpider(scrapy.Spider):
 
         # create an empty matrix to store the CSV data in
         matrix = np.zeros(shape=len(rows),
-                          dtype=[('date', 'f8'),
+                          dtype=[('date', 'i8'),
                                  ('value', 'f8'),
                                  ('high', 'f8'),
                                  ('low', 'f8'),
@@ -134,10 +137,12 @@ class NasdaqOmxSpider(scrapy.Spider):
             # Strip hours and minutes from the date string.
             # It has been observed that some tickers have an hour offset to the timestamp.
             # For example OMXC25DVP: datetime.datetime(2017, 1, 2, 6, 0)
-            stripped_date = datetime.datetime(parsed_date.year, parsed_date.month, parsed_date.day)
-            
-            # convert to timestamp
-            date = stripped_date.timestamp()
+            stripped_date = datetime.date(parsed_date.year, parsed_date.month, parsed_date.day)
+
+            # Convert to timestamp with calendar arithmetic instead of
+            # timestamp() so that the result doesn't depend on the local
+            # timezone of the machine running the scraper.
+            date = (stripped_date.toordinal() - EPOCH_ORDINAL) * 86400
             
             # convert to float, None values will be converted to 0.0
             value = 0.0 if row['Value'] is None else float(row['Value'])
@@ -3,6 +3,9 @@ import scrapy
 import datetime
 import numpy as np
 
+# proleptic Gregorian ordinal of the epoch, 1970-01-01
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
 
 class NetfondsSpider(scrapy.Spider):
     name = 'netfonds'
@@ -113,7 +116,7 @@ class NetfondsSpider(scrapy.Spider):
 
         # create an empty matrix to store the CSV data in
         matrix = np.zeros(shape=len(lines),
-                          dtype=[('date', 'f8'),
+                          dtype=[('date', 'i8'),
                                  ('open', 'f8'),
                                  ('high', 'f8'),
                                  ('low', 'f8'),
@@ -128,8 +131,12 @@ class NetfondsSpider(scrapy.Spider):
             (date, paper, exchange, open_price, high_price,
              low_price, close_price, volume, value) = line.split(";")
 
-            # parse row items
-            date = datetime.datetime.strptime(date, '%Y%m%d').timestamp()
+            # Parse row items.
+            # The date is converted with calendar arithmetic instead of
+            # timestamp() so that the result doesn't depend on the local
+            # timezone of the machine running the scraper.
+            date = (datetime.datetime.strptime(date, '%Y%m%d').toordinal()
+                    - EPOCH_ORDINAL) * 86400
             open_price = float(open_price)
             high_price = float(high_price)
             low_price = float(low_price)